@@ -6,15 +6,14 @@ Mobile-first responsive design.
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import re
 import csv
 from datetime import datetime
 import os
-import plotly.graph_objects as go
 from src.data_loader import DataLoader
 from src.recommender import RestaurantRecommender
 import random
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 # Page configuration
 st.set_page_config(
@@ -24,7 +23,28 @@ st.set_page_config(
     initial_sidebar_state="collapsed"  # Collapsed by default for mobile
 )
 
-users = pd.read_csv("data/users.csv")
+@st.cache_data
+def load_users_table(version):
+    """
+    Users table for the login/setup flow.
+
+    Cached on the file mtime, so script reruns (every widget click)
+    reuse the parsed frame instead of re-reading the CSV; a signup
+    bumps the mtime and transparently invalidates the cache.
+    """
+    return pd.read_csv("data/users.csv")
+
+
+def users_version():
+    """Cache key for the users table: the CSV's mtime."""
+    return os.path.getmtime("data/users.csv")
+
+
+@st.cache_data
+def phone_index(version):
+    """Phone number -> positional row index, rebuilt when users.csv changes."""
+    df = load_users_table(version)
+    return {str(p): i for i, p in enumerate(df["phonenumber"].to_numpy())}
 
 # --- Session setup ---
 if "logged_in" not in st.session_state:
@@ -42,7 +62,11 @@ def login_page():
     st.session_state.number = number
 
     if st.button("Login"):
-        user_row = users[users["phonenumber"].astype(str) == number]
+        # O(1) dict probe instead of casting and scanning the whole column;
+        # the table itself is only fetched on an actual login click
+        users = load_users_table(users_version())
+        idx = phone_index(users_version()).get(number)
+        user_row = users.iloc[[idx]] if idx is not None else users.iloc[0:0]
 
         if user_row.empty:
             st.warning("Number not found. Let's set up your account.")
@@ -57,14 +81,19 @@ def login_page():
             st.rerun()
 
 
+# On-disk column order of data/users.csv; appends are keyed to this
+# header instead of relying on dict insertion order
+USER_CSV_FIELDS = ['user_id', 'username', 'phonenumber', 'join_date',
+                   'allgergies', 'alcohol', 'dietary_restrictions', 'friend']
+
+
 def load_users_csv():
     "Load existing users data or create a new CSV if it doesn’t exist."
     if not os.path.exists('data/users.csv'):
         # Create the CSV with headers if it doesn’t exist
         with open('data/users.csv', 'w', newline='') as file:
             writer = csv.writer(file)
-            writer.writerow(['user_id', 'username', 'phonenumber', 'joined_date',
-                             'allergies', 'alcohol', 'vegetarian', 'vegan', 'friend'])
+            writer.writerow(USER_CSV_FIELDS)
     return pd.read_csv('data/users.csv')
 
 def get_next_user_id(df):
@@ -73,29 +102,28 @@ def get_next_user_id(df):
 
 def save_user_preferences(user_data):
     """Save user preferences to CSV."""
-    # Load existing users
-    df = load_users_csv()
-    
+    # Ensure the file exists, then check duplicates against the cached
+    # table instead of re-parsing the CSV on every signup
+    if not os.path.exists('data/users.csv'):
+        load_users_csv()
+    df = load_users_table(users_version())
+
     # Check if username already exists
     if user_data['username'] in df['username'].values:
         st.error("Username already exists. Please choose a different username.")
         return False
     
-    # Append new user
+    # Append new user, mapping fields by name so the row can never be
+    # written positionally misaligned with the header
     with open('data/users.csv', 'a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(user_data.values())
-    
-    # Update global users DataFrame
-    global users
-    users = pd.read_csv('data/users.csv')
+        writer = csv.DictWriter(file, fieldnames=USER_CSV_FIELDS)
+        writer.writerow(user_data)
     
     return True
 
 def setup_page ():
-    global users
     st.title("Restaurant Preferences Profile")
-    users = pd.read_csv("data/users.csv")
+    users = load_users_table(users_version())
     
     # User Information
     st.header("Personal Details")
@@ -180,10 +208,10 @@ def setup_page ():
             'user_id': user_id,
             'username': username,
             'phonenumber': phone_number,
-            'joined_date': datetime.now().strftime('%Y-%m-%d'),
-            'allergies': ';'.join(allergies) if allergies else 'None',
+            'join_date': date.today().isoformat(),
+            'allgergies': ';'.join(allergies) if allergies else 'None',
             'alcohol': alcohol_preference,
-            'dietary_restriction': ';'.join(dietary_restrictions) if dietary_restrictions else 'None',
+            'dietary_restrictions': ';'.join(dietary_restrictions) if dietary_restrictions else 'None',
             'friend': friend_ids or ''
         }
         
@@ -193,9 +221,6 @@ def setup_page ():
 
             # reload data - clear cache to force reload
             st.cache_resource.clear()
-            
-            # Update global users variable
-            users = pd.read_csv("data/users.csv")
 
             # Optional: Show the entered data
             st.write("Your Profile:")
@@ -206,13 +231,11 @@ def setup_page ():
             st.rerun()
 
 
-if __name__ == '__setup_page':
-    setup_page ()
-
-# Mobile-first CSS styling
-def inject_mobile_css():
-    """Inject custom CSS for mobile-first responsive design."""
-    st.markdown("""
+# Mobile-first CSS styling. The blob is minified once at import time
+# (comments stripped, whitespace collapsed) since Streamlit has to
+# re-emit it on every rerun - skipping the emit would drop the styles
+# when the script output is replaced.
+_MOBILE_CSS = """
         <style>
         /* Mobile-first base styles */
         .main .block-container {
@@ -350,7 +373,14 @@ def inject_mobile_css():
             }
         }
         </style>
-    """, unsafe_allow_html=True)
+"""
+_MOBILE_CSS = re.sub(r'/\*.*?\*/', '', _MOBILE_CSS, flags=re.S)
+_MOBILE_CSS = re.sub(r'\s+', ' ', _MOBILE_CSS).strip()
+
+
+def inject_mobile_css():
+    """Inject custom CSS for mobile-first responsive design."""
+    st.markdown(_MOBILE_CSS, unsafe_allow_html=True)
 
 
 inject_mobile_css()
@@ -370,19 +400,101 @@ def get_recommender(_loader):
     return RestaurantRecommender(_loader)
 
 
-def display_restaurant_card(restaurant, show_predicted_rating=False):
-    """Display a restaurant card with details - single column layout."""
-    with st.container():
+def data_version():
+    """Cheap cache key for derived data: newest mtime across the data CSVs."""
+    return max(
+        os.path.getmtime(os.path.join('data', name))
+        for name in ('restaurants.csv', 'users.csv', 'user_history.csv')
+    )
+
+
+@st.cache_data
+def get_user_lookups(_loader, version):
+    """Memoized O(1) lookup dicts between user_id and username."""
+    users_df = _loader.load_users()
+    uid_to_username = dict(zip(users_df['user_id'], users_df['username']))
+    username_to_uid = dict(zip(users_df['username'], users_df['user_id']))
+    return uid_to_username, username_to_uid
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def get_recommendations(_recommender, version, vibes, user_id, friend_ids, selected_time, n):
+    """
+    Memoized wrapper around the recommender.
+
+    Keyed on the selection tuple plus the data version, so re-running
+    the same query (or another session asking for it) skips the
+    filtering/ranking work entirely.
+    """
+    return _recommender.recommend_by_vibe_and_time(
+        vibes=list(vibes),
+        user_id=user_id,
+        friend_ids=list(friend_ids) if friend_ids else None,
+        selected_time=selected_time,
+        n=n
+    )
+
 
-        points = int(restaurant['points']) if pd.notna(restaurant['points']) else 0
-        st.markdown(f"""
-        <div class="restaurant-card">
-            <h3 style="margin-top: 0;">🍽️ {restaurant['name']} ({points} points)</h3>
-            <div style="line-height: 1.6;">
-            {', '.join(restaurant['vibes'])} | {restaurant['cuisine']} | {restaurant['location']} | {restaurant['price_range']}
-            </div>
+@st.cache_data
+def get_vibe_options(_loader, version):
+    """
+    Memoized tuple of vibes offered by at least one restaurant.
+
+    The loader builds the vocabulary in the same pass that parses the
+    per-restaurant vibe lists, so this is just a cached getter.
+    """
+    return _loader.get_vibe_list()
+
+
+def restaurant_card_html(restaurant):
+    """
+    Build the card HTML for a single restaurant - single column layout.
+
+    Accepts a row namedtuple (from itertuples); attribute access avoids
+    the per-row Series construction that iterrows would pay. `points`
+    arrives already cleaned to int by the loader.
+    """
+    return f"""
+    <div class="restaurant-card">
+        <h3 style="margin-top: 0;">🍽️ {restaurant.name} ({restaurant.points} points)</h3>
+        <div style="line-height: 1.6;">
+        {restaurant.vibes_display} | {restaurant.cuisine} | {restaurant.location} | {restaurant.price_range}
         </div>
-        """, unsafe_allow_html=True)
+    </div>
+    """
+
+
+def restaurant_cards_html_bulk(restaurants):
+    """
+    Build card HTML for a whole frame with vectorized string ops.
+
+    Faster than the per-row path for longer lists: one pandas string
+    concatenation instead of a Python-level loop over rows.
+    """
+    points = restaurants['points'].astype(str)
+    cards = (
+        '<div class="restaurant-card">'
+        '<h3 style="margin-top: 0;">🍽️ ' + restaurants['name'] + ' (' + points + ' points)</h3>'
+        '<div style="line-height: 1.6;">'
+        + restaurants['vibes_display']
+        + ' | ' + restaurants['cuisine'].astype(str)
+        + ' | ' + restaurants['location'].astype(str)
+        + ' | ' + restaurants['price_range'].astype(str)
+        + '</div></div>'
+    )
+    return cards.str.cat(sep='\n')
+
+
+def display_restaurant_cards(restaurants):
+    """Render restaurant cards as one markdown write instead of one per row."""
+    if len(restaurants) > 5:
+        html = restaurant_cards_html_bulk(restaurants)
+    else:
+        html = "\n".join(
+            restaurant_card_html(restaurant)
+            for restaurant in restaurants.itertuples(index=False)
+        )
+    st.markdown(html, unsafe_allow_html=True)
 
 
 
@@ -401,41 +513,46 @@ def main():
 def show_combined_recommendation(loader, recommender):
     st.title("See you soon!")
 
-    users_df = loader.load_users()
-    # Automatically select the logged-in user
-    current_user_row = users_df.loc[users_df['phonenumber'] == st.session_state.number]
-    selected_user = current_user_row['username'].values[0]
-    current_user_id = current_user_row['user_id'].values[0]
-    st.write(f"Hey, {selected_user}!")
-    st.divider()
-
-    # Vibe selection
-    restaurants_df = loader.load_restaurants()
-    # Only include vibes that have at least one restaurant
-    all_vibes = restaurants_df['vibes'].explode().dropna()
-    vibes = sorted([v for v in all_vibes.unique().tolist() if len(restaurants_df[restaurants_df['vibes'].apply(lambda x: v in x)]) > 0])
-    selected_vibes = st.multiselect("What's the vibe?", vibes, help="Choose one or more vibes for your outing")
+    # Only the columns this page reads - keeps the view narrow
+    users_df = loader.load_users(columns=['user_id', 'username', 'phonenumber', 'friend_ids'])
+    # Automatically select the logged-in user via the cached phone index
+    # (same CSV row order as the loader's frame) instead of a column scan
+    idx = phone_index(users_version()).get(str(st.session_state.number))
+    if idx is None:
+        st.error("Session user not found. Please log in again.")
+        st.session_state.logged_in = False
+        st.session_state.page = "login"
+        st.rerun()
+    current_user_row = users_df.iloc[[idx]]
+    selected_user = current_user_row['username'].iat[0]
+    current_user_id = current_user_row['user_id'].iat[0]
+    # One protocol message for the static greeting + divider
+    st.markdown(f"Hey, {selected_user}!\n\n---")
+
+    # Vibe selection - memoized so reruns skip the explode/unique pass
+    vibes = get_vibe_options(loader, data_version())
+    selected_vibes = st.multiselect("What's the vibe?", list(vibes), help="Choose one or more vibes for your outing")
     st.divider()
     
     # Option to add friends - only show user's actual friends
-    friend_ids_str = current_user_row['friend'].values[0]
-    if pd.notna(friend_ids_str) and friend_ids_str:
-        friend_ids = [int(fid.strip()) for fid in str(friend_ids_str).split(';')]
-        friend_options = users_df[users_df['user_id'].isin(friend_ids)]['username'].tolist()
-    else:
-        friend_options = []
+    # Dict lookups avoid an O(N) mask per rerun (and per dropdown entry)
+    uid_to_username, username_to_uid = get_user_lookups(loader, data_version())
+    friend_ids = current_user_row['friend_ids'].iat[0]
+    friend_options = [uid_to_username[fid] for fid in friend_ids if fid in uid_to_username]
     
     selected_friends = st.multiselect("Are you bringing friends?", friend_options, help="Select your friends")
     st.divider()
 
     # Date/time selection
     selected_date = st.date_input("Date", help="Pick a date")
-    # Calculate the next half hour from now
-    now = datetime.now()
-    next_half_hour = (now + timedelta(minutes=30)).replace(second=0, microsecond=0)
-    next_half_hour = next_half_hour.replace(minute=(next_half_hour.minute // 30) * 30)
+    # Default to the next half hour, computed once per session so the
+    # widget default doesn't drift (and reset user input) on reruns
+    if '_default_time' not in st.session_state:
+        next_half_hour = (datetime.now() + timedelta(minutes=30)).replace(second=0, microsecond=0)
+        next_half_hour = next_half_hour.replace(minute=(next_half_hour.minute // 30) * 30)
+        st.session_state._default_time = next_half_hour.time()
 
-    selected_time = st.time_input("Time", value=next_half_hour.time(), help="Pick a time")
+    selected_time = st.time_input("Time", value=st.session_state._default_time, help="Pick a time")
 
     st.divider()
 
@@ -445,20 +562,21 @@ def show_combined_recommendation(loader, recommender):
         # Get friend IDs from selected friend names
         friend_user_ids = []
         if selected_friends:
-            friend_user_ids = users_df[users_df['username'].isin(selected_friends)]['user_id'].tolist()
+            friend_user_ids = [username_to_uid[name] for name in selected_friends]
         
         with st.spinner("Will we see you soon?"):
-            recommendations = recommender.recommend_by_vibe_and_time(
-                vibes=selected_vibes,
-                user_id=current_user_id,
-                friend_ids=friend_user_ids if friend_user_ids else None,
-                selected_time=selected_time,
-                n=3
+            recommendations = get_recommendations(
+                recommender,
+                data_version(),
+                tuple(selected_vibes),
+                current_user_id,
+                tuple(friend_user_ids),
+                selected_time,
+                3
             )
         
         if len(recommendations) > 0:
-            for _, restaurant in recommendations.iterrows():
-                display_restaurant_card(restaurant)
+            display_restaurant_cards(recommendations)
         else:
             st.warning("No restaurants found for the selected vibe(s). Try different vibes!")
 
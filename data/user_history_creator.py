@@ -1,26 +1,30 @@
-import csv
-import random
-from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
 
 # File path
 file_path = 'C:/Users/ljman/Documents/GitHub/wheretoeat/data/user_history.csv'
 
-# Generate 100 new rows
-new_rows = []
-ratings = ['yes'] * 30 + ['None'] * 30 + ['no'] * 30 + ['meh'] * 10
+# Generate 100 new rows with vectorized draws: one RNG call per column
+# instead of per-row random.randint/choice, so larger regenerations
+# scale without a Python-level loop.
+N = 100
 user_id_start = 9  # Start user_id from 9 since 8 is the last in the current file
 
-for i in range(100):
-    user_id = user_id_start + i
-    restaurant_id = random.randint(1, 20)  # Assuming 20 restaurants
-    visit_date = datetime(2023, 1, 1) + timedelta(days=random.randint(0, 364))
-    visit_date = visit_date.strftime('%Y-%m-%d')
-    rating = random.choice(ratings)
-    new_rows.append([user_id, restaurant_id, visit_date, rating])
+rng = np.random.default_rng()
+user_ids = np.arange(user_id_start, user_id_start + N)
+restaurant_ids = rng.integers(1, 21, size=N)  # Assuming 20 restaurants
+days = rng.integers(0, 365, size=N)
+visit_dates = (np.datetime64('2023-01-01') + days.astype('timedelta64[D]')).astype(str)
+ratings = rng.choice(['yes', 'None', 'no', 'meh'], size=N, p=[0.3, 0.3, 0.3, 0.1])
 
-# Write to the CSV file
-with open(file_path, 'a', newline='') as file:
-    writer = csv.writer(file)
-    writer.writerows(new_rows)
+new_rows = pd.DataFrame({
+    'user_id': user_ids,
+    'restaurant_id': restaurant_ids,
+    'visit_date': visit_dates,
+    'rating': ratings,
+})
 
-print("100 new rows added successfully.")
\ No newline at end of file
+# Append to the CSV file
+new_rows.to_csv(file_path, mode='a', header=False, index=False)
+
+print(f"{N} new rows added successfully.")
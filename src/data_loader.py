@@ -4,13 +4,44 @@ Handles loading and managing restaurant, user, and review data from CSV files.
 Provides utility functions for data access and filtering.
 """
 
+import numpy as np
 import pandas as pd
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, List, Tuple
 import os
 
 
+# Date columns per table, parsed once before the Parquet sidecar is
+# written so reloads get real timestamps instead of re-parsing strings
+TABLE_DATE_COLUMNS = {
+    "users": ["join_date"],
+    "user_history": ["visit_date"],
+}
+
+
+def _arrow_column_types(stem: str):
+    """
+    Explicit pyarrow column types for a table's CSV parse.
+
+    Declaring the id and date columns up front skips arrow's type
+    inference pass and parses timestamps natively, so the loaders get
+    int32 keys and datetime columns straight from the reader.
+    """
+    import pyarrow as pa
+
+    types = {
+        "restaurants": {"restaurant_id": pa.int32()},
+        "users": {"user_id": pa.int32()},
+        "user_history": {"user_id": pa.int32(), "restaurant_id": pa.int32()},
+    }.get(stem, {})
+    for col in TABLE_DATE_COLUMNS.get(stem, []):
+        types[col] = pa.timestamp('s')
+    return types
+
+
 class DataLoader:
     """Manages loading and caching of restaurant data."""
     
@@ -25,6 +56,17 @@ class DataLoader:
         self.restaurants_df: Optional[pd.DataFrame] = None
         self.users_df: Optional[pd.DataFrame] = None
         self.history_df: Optional[pd.DataFrame] = None
+        self._unique_cache: dict = {}
+        self._vibe_list: Tuple[str, ...] = ()
+        # Hash indexes built lazily at load time for O(1)/O(k) lookups
+        self._restaurants_by_id: Optional[pd.DataFrame] = None
+        self._users_by_id: Optional[pd.DataFrame] = None
+        self._history_by_user: Optional[dict] = None
+        self._history_by_restaurant: Optional[dict] = None
+        self._stats: Optional[dict] = None
+        # Serializes the history load: both the load_all_data thread
+        # pool and load_restaurants' rating aggregation may trigger it
+        self._history_lock = threading.Lock()
         
     def load_all_data(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """
@@ -33,45 +75,173 @@ class DataLoader:
         Returns:
             Tuple of (restaurants_df, users_df, reviews_df)
         """
-        self.restaurants_df = self.load_restaurants()
-        self.users_df = self.load_users()
-        self.history_df = self.load_history()
-        
+        # The three tables are independent and I/O bound, so read them
+        # on a thread pool: pyarrow's parser releases the GIL, and each
+        # loader writes only its own attributes and caches, so the
+        # workers never touch shared state.
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            restaurants_future = executor.submit(self.load_restaurants)
+            users_future = executor.submit(self.load_users)
+            history_future = executor.submit(self.load_history)
+            self.restaurants_df = restaurants_future.result()
+            self.users_df = users_future.result()
+            self.history_df = history_future.result()
+
         return self.restaurants_df, self.users_df, self.history_df
     
-    def load_restaurants(self) -> pd.DataFrame:
-        """Load restaurant data from CSV."""
-        if self.restaurants_df is not None:
-            return self.restaurants_df
-            
-        file_path = self.data_dir / "restaurants.csv"
-        self.restaurants_df = pd.read_csv(file_path)
+    def _read_table(self, stem: str) -> pd.DataFrame:
+        """
+        Read a data table, preferring a Parquet sidecar over the CSV.
+
+        The Parquet copy (Snappy-compressed) is written on first load and
+        reused on subsequent cold starts as long as it is at least as new
+        as the CSV, which cuts parse time considerably. Falls back to
+        plain CSV if pyarrow is unavailable.
+
+        Args:
+            stem: File name without extension (e.g. "restaurants")
+
+        Returns:
+            DataFrame loaded from Parquet or CSV
+        """
+        csv_path = self.data_dir / f"{stem}.csv"
+        parquet_path = self.data_dir / f"{stem}.parquet"
+        date_columns = TABLE_DATE_COLUMNS.get(stem, [])
+
+        try:
+            if (
+                parquet_path.exists()
+                and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime
+            ):
+                return pd.read_parquet(parquet_path)
+
+            # pyarrow's multithreaded CSV reader for the cold parse,
+            # with declared key/date types so inference is skipped and
+            # timestamps come out native (no pd.to_datetime pass)
+            from pyarrow import csv as pa_csv
+            df = pa_csv.read_csv(
+                csv_path,
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=_arrow_column_types(stem)
+                ),
+            ).to_pandas()
+            df.to_parquet(parquet_path, compression='snappy', index=False)
+            return df
+        except ImportError:
+            # pyarrow not installed - fall back to CSV
+            return pd.read_csv(csv_path, parse_dates=date_columns or None)
 
-        self.restaurants_df['vibes'] = self.restaurants_df['vibe'].fillna('').apply(lambda x: [v.strip() for v in x.split(';')] if x else [])
+    def load_restaurants(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Load restaurant data from CSV (cached as Parquet after first load).
+
+        Args:
+            columns: Optional column projection; callers that only need a
+                few fields get a narrow view instead of the full table
+
+        Returns:
+            DataFrame of restaurants (projected to `columns` if given)
+        """
+        if self.restaurants_df is None:
+            df, unique_vibes = self._enrich_restaurants(self._read_table("restaurants"))
+            self.restaurants_df = df
+            self._vibe_list = tuple(sorted(unique_vibes - {''}))
+            # id-keyed view for O(1) get_restaurant_by_id lookups
+            self._restaurants_by_id = self.restaurants_df.set_index('restaurant_id', drop=False)
+
+        if columns is not None:
+            return self.restaurants_df[columns]
         return self.restaurants_df
+
+    def _enrich_restaurants(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, set]:
+        """
+        Apply the load-time preprocessing to a restaurants frame.
+
+        Shared by load_restaurants and the pushdown branch of
+        filter_restaurants, so a filtered cold read carries the same
+        schema as the cached table.
+
+        Returns:
+            Tuple of (enriched frame, set of vibe tokens seen)
+        """
+        # int32 keeps join/groupby hash tables small and matches the other tables
+        df['restaurant_id'] = df['restaurant_id'].astype('int32')
+        # Clean display fields once, vectorized, instead of per card render
+        df['points'] = df['points'].fillna(0).astype('int32')
+        # Category dtype: equality filters compare int codes instead of
+        # Python strings, and the columns shrink to code arrays
+        for col in ('cuisine', 'location', 'price_range'):
+            df[col] = df[col].astype('category')
+
+        # Single pass over the vibe column: build the per-row vibe sets
+        # and the unique vibe vocabulary together. frozenset makes the
+        # membership tests in the recommender O(1) per vibe.
+        unique_vibes = set()
+
+        def parse_vibes(raw):
+            if not raw:
+                return frozenset()
+            parsed = frozenset(v.strip() for v in raw.split(';'))
+            unique_vibes.update(parsed)
+            return parsed
+
+        # astype(object) pins the dtype even when df has no rows, where
+        # apply would otherwise keep the source column's string dtype
+        df['vibes'] = df['vibe'].fillna('').apply(parse_vibes).astype(object)
+        # Display string kept separately (vectorized) so cards don't
+        # have to re-join/sort the set per render
+        df['vibes_display'] = df['vibe'].fillna('').str.replace(';', ', ')
+
+        # Pre-aggregate rating stats from the history table: one
+        # groupby at load time instead of a history scan per query.
+        # Restaurants with no visits get a neutral 0.0 / 0.
+        rating_stats = self.load_history().groupby('restaurant_id')['rating'].agg(['mean', 'count'])
+        df['avg_rating'] = df['restaurant_id'].map(rating_stats['mean']).fillna(0.0)
+        df['num_reviews'] = df['restaurant_id'].map(rating_stats['count']).fillna(0).astype('int32')
+        return df, unique_vibes
     
-    def load_users(self) -> pd.DataFrame:
-        """Load user data from CSV."""
-        if self.users_df is not None:
-            return self.users_df
-            
-        file_path = self.data_dir / "users.csv"
-        self.users_df = pd.read_csv(file_path)
-        self.users_df['join_date'] = pd.to_datetime(self.users_df['join_date'])
+    def load_users(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load user data from CSV, optionally projected to `columns`."""
+        if self.users_df is None:
+            self.users_df = self._read_table("users")
+            self.users_df['user_id'] = self.users_df['user_id'].astype('int32')
+            # Parse the semicolon-separated friend list once at load time
+            # so renders read a ready list instead of splitting strings
+            self.users_df['friend_ids'] = self.users_df['friend'].fillna('').astype(str).map(
+                lambda s: [int(float(x)) for x in s.split(';') if x.strip() and x.strip().lower() != 'nan']
+            )
+            # id-keyed view for O(1) get_user_by_id lookups
+            self._users_by_id = self.users_df.set_index('user_id', drop=False)
+
+        if columns is not None:
+            return self.users_df[columns]
         return self.users_df
     
     def load_history(self) -> pd.DataFrame:
         """Load user history data from CSV and convert ratings to numeric."""
-        if self.history_df is not None:
-            return self.history_df
+        # Locked because load_restaurants also calls this for its rating
+        # aggregates, which can race with the load_all_data thread pool
+        with self._history_lock:
+            if self.history_df is not None:
+                return self.history_df
 
-        file_path = self.data_dir / "user_history.csv"
-        self.history_df = pd.read_csv(file_path)
-        self.history_df['visit_date'] = pd.to_datetime(self.history_df['visit_date'])
-        # Convert ratings to numeric: yes=5, meh=3, no/None=1
-        rating_map = {'yes': 5, 'meh': 3, 'no': 1, 'None': 1, None: 1}
-        self.history_df['rating'] = self.history_df['rating'].map(rating_map).fillna(1).astype(int)
-        return self.history_df
+            history_df = self._read_table("user_history")
+            history_df['user_id'] = history_df['user_id'].astype('int32')
+            history_df['restaurant_id'] = history_df['restaurant_id'].astype('int32')
+            # Convert ratings to numeric: yes=5, meh=3, no/None=1
+            rating_map = {'yes': 5, 'meh': 3, 'no': 1, 'None': 1, None: 1}
+            history_df['rating'] = history_df['rating'].map(rating_map).fillna(1).astype(int)
+            # Sort newest-first once so "recent N" consumers can boolean-index
+            # and head(N) without re-sorting per call
+            history_df = history_df.sort_values(
+                'visit_date', ascending=False
+            ).reset_index(drop=True)
+            # Positional indexes per user/restaurant (dicts of int arrays),
+            # so the per-id getters slice instead of scanning the column
+            self._history_by_user = history_df.groupby('user_id').indices
+            self._history_by_restaurant = history_df.groupby('restaurant_id').indices
+            self.history_df = history_df
+            return self.history_df
     
     def get_restaurant_by_id(self, restaurant_id: int) -> Optional[pd.Series]:
         """
@@ -85,12 +255,11 @@ class DataLoader:
         """
         if self.restaurants_df is None:
             self.load_restaurants()
-            
-        restaurant = self.restaurants_df[
-            self.restaurants_df['restaurant_id'] == restaurant_id
-        ]
-        
-        return restaurant.iloc[0] if len(restaurant) > 0 else None
+
+        try:
+            return self._restaurants_by_id.loc[restaurant_id]
+        except KeyError:
+            return None
     
     def get_user_by_id(self, user_id: int) -> Optional[pd.Series]:
         """
@@ -104,9 +273,11 @@ class DataLoader:
         """
         if self.users_df is None:
             self.load_users()
-            
-        user = self.users_df[self.users_df['user_id'] == user_id]
-        return user.iloc[0] if len(user) > 0 else None
+
+        try:
+            return self._users_by_id.loc[user_id]
+        except KeyError:
+            return None
     
     def get_reviews_by_restaurant(self, restaurant_id: int) -> pd.DataFrame:
         """
@@ -116,14 +287,15 @@ class DataLoader:
             restaurant_id: Restaurant ID
             
         Returns:
-            DataFrame of reviews for the restaurant
+            DataFrame of reviews for the restaurant, newest first.
+            Read-only slice of the cached history table; callers must
+            not mutate it in place.
         """
         if self.history_df is None:
-            self.load_reviews()
-            
-        return self.history_df[
-            self.history_df['restaurant_id'] == restaurant_id
-        ].copy()
+            self.load_history()
+
+        positions = self._history_by_restaurant.get(restaurant_id, [])
+        return self.history_df.iloc[positions]
 
     def get_history_by_user(self, user_id: int) -> pd.DataFrame:
         """
@@ -133,14 +305,15 @@ class DataLoader:
             user_id: User ID
             
         Returns:
-            DataFrame of history records by the user
+            DataFrame of history records by the user, newest first.
+            Read-only slice of the cached history table; callers must
+            not mutate it in place.
         """
         if self.history_df is None:
-            self.load_reviews()
-            
-        return self.history_df[
-            self.history_df['user_id'] == user_id
-        ].copy()
+            self.load_history()
+
+        positions = self._history_by_user.get(user_id, [])
+        return self.history_df.iloc[positions]
     
     def filter_restaurants(
         self,
@@ -161,36 +334,89 @@ class DataLoader:
         Returns:
             Filtered DataFrame of restaurants
         """
-        if self.restaurants_df is None:
-            self.load_restaurants()
-            
-        filtered_df = self.restaurants_df.copy()
-        
-        if cuisine:
-            filtered_df = filtered_df[filtered_df['cuisine'] == cuisine]
-        
-        if location:
-            filtered_df = filtered_df[filtered_df['location'] == location]
-        
-        if price_range:
-            filtered_df = filtered_df[filtered_df['price_range'] == price_range]
-        
+        # Equality predicates can be pushed down into the Parquet reader,
+        # skipping row groups entirely on a cold read. Only worth it when
+        # the full frame is not already in memory; min_rating needs the
+        # history aggregates, so it stays on the in-memory path.
+        pushdown = [
+            (col, '=', value)
+            for col, value in [
+                ('cuisine', cuisine),
+                ('location', location),
+                ('price_range', price_range),
+            ]
+            if value
+        ]
+        parquet_path = self.data_dir / "restaurants.parquet"
+
+        if (
+            self.restaurants_df is None
+            and pushdown
+            and min_rating <= 0
+            and parquet_path.exists()
+        ):
+            try:
+                filtered_df = pd.read_parquet(parquet_path, filters=pushdown)
+            except ImportError:
+                pass  # no pyarrow - fall through to the in-memory path
+            else:
+                # Same preprocessing as load_restaurants, so cold results
+                # carry the schema downstream consumers expect
+                filtered_df, _ = self._enrich_restaurants(filtered_df)
+                # Category sets must come from the full table, not just
+                # the filtered rows, to match the warm frame's dtypes;
+                # a column-projected sidecar read keeps that cheap
+                full_values = pd.read_parquet(
+                    parquet_path, columns=['cuisine', 'location', 'price_range']
+                )
+                for col in ('cuisine', 'location', 'price_range'):
+                    filtered_df[col] = filtered_df[col].cat.set_categories(
+                        sorted(full_values[col].dropna().unique())
+                    )
+                return filtered_df
+
+        # Warm path: evaluate all predicates as one fused boolean mask,
+        # so the frame is materialized once instead of per clause
+        df = self.load_restaurants()
+        mask = np.ones(len(df), dtype=bool)
+        for col, _, value in pushdown:
+            mask &= (df[col] == value).to_numpy()
         if min_rating > 0:
-            filtered_df = filtered_df[filtered_df['avg_rating'] >= min_rating]
-        
-        return filtered_df
+            mask &= (df['avg_rating'] >= min_rating).to_numpy()
+        return df[mask]
     
-    def get_unique_cuisines(self) -> List[str]:
-        """Get list of unique cuisines."""
-        if self.restaurants_df is None:
-            self.load_restaurants()
-        return sorted(self.restaurants_df['cuisine'].unique().tolist())
-    
-    def get_unique_price_ranges(self) -> List[str]:
-        """Get list of unique price ranges."""
+    def _unique_values(self, column: str) -> Tuple[str, ...]:
+        """Memoized sorted unique values of a restaurant column."""
+        if column not in self._unique_cache:
+            if self.restaurants_df is None:
+                self.load_restaurants()
+            series = self.restaurants_df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Category columns carry their value set as metadata -
+                # no column scan needed
+                values = series.cat.categories.tolist()
+            else:
+                values = series.unique().tolist()
+            self._unique_cache[column] = tuple(sorted(values))
+        return self._unique_cache[column]
+
+    def get_unique_cuisines(self) -> Tuple[str, ...]:
+        """Get tuple of unique cuisines (memoized)."""
+        return self._unique_values('cuisine')
+
+    def get_vibe_list(self) -> Tuple[str, ...]:
+        """Get tuple of unique vibes, built during the restaurant load pass."""
         if self.restaurants_df is None:
             self.load_restaurants()
-        return sorted(self.restaurants_df['price_range'].unique().tolist())
+        return self._vibe_list
+
+    def get_unique_locations(self) -> Tuple[str, ...]:
+        """Get tuple of unique locations (memoized)."""
+        return self._unique_values('location')
+
+    def get_unique_price_ranges(self) -> Tuple[str, ...]:
+        """Get tuple of unique price ranges (memoized)."""
+        return self._unique_values('price_range')
     
     def create_sqlite_db(self, db_path: str = "data/restaurants.db"):
         """
@@ -213,6 +439,23 @@ class DataLoader:
         
         conn.close()
         print(f"SQLite database created at {db_path}")
+
+    def create_parquet_files(self):
+        """
+        One-time conversion of the CSV files to Snappy-compressed Parquet.
+        Subsequent loads pick up the Parquet copies automatically.
+        """
+        for stem in ("restaurants", "users", "user_history"):
+            df = pd.read_csv(
+                self.data_dir / f"{stem}.csv",
+                parse_dates=TABLE_DATE_COLUMNS.get(stem) or None
+            )
+            df.to_parquet(
+                self.data_dir / f"{stem}.parquet",
+                compression='snappy',
+                index=False
+            )
+            print(f"Parquet file created at {self.data_dir / f'{stem}.parquet'}")
     
     def get_user_item_matrix(self) -> pd.DataFrame:
         """
@@ -233,25 +476,61 @@ class DataLoader:
             fill_value=0
         )
         return user_item_matrix
+
+    def get_user_item_sparse(self):
+        """
+        Sparse CSR user-item matrix for collaborative filtering.
+
+        The dense pivot is mostly zeros; the CSR form stores only the
+        rated cells and feeds scipy/sklearn sparse-aware ops directly.
+        Duplicate (user, restaurant) visits are averaged, matching the
+        dense pivot's aggregation.
+
+        Returns:
+            Tuple of (csr_matrix of shape (n_users, n_restaurants),
+            user_id array per row, restaurant_id array per column)
+        """
+        from scipy import sparse
+
+        if self.history_df is None:
+            self.load_history()
+
+        ratings = (
+            self.history_df
+            .groupby(['user_id', 'restaurant_id'])['rating']
+            .mean()
+            .reset_index()
+        )
+        user_codes, user_ids = pd.factorize(ratings['user_id'], sort=True)
+        item_codes, item_ids = pd.factorize(ratings['restaurant_id'], sort=True)
+
+        # float32: ratings are small integers, and the downstream
+        # similarity product takes BLAS's faster single-precision path
+        matrix = sparse.csr_matrix(
+            (ratings['rating'].to_numpy(dtype=np.float32), (user_codes, item_codes)),
+            shape=(len(user_ids), len(item_ids))
+        )
+        return matrix, user_ids.to_numpy(), item_ids.to_numpy()
     
     def get_statistics(self) -> dict:
         """
         Get summary statistics about the dataset.
         
         Returns:
-            Dictionary with dataset statistics
+            Dictionary with dataset statistics (memoized per loader)
         """
-        if self.restaurants_df is None:
-            self.load_all_data()
-        
-        stats = {
-            'total_restaurants': len(self.restaurants_df),
-            'total_users': len(self.users_df),
-            'total_reviews': len(self.history_df),
-            'cuisines': self.restaurants_df['cuisine'].nunique(),
-        }
-        
-        return stats
+        if self._stats is None:
+            if self.restaurants_df is None:
+                self.load_all_data()
+
+            self._stats = {
+                'total_restaurants': len(self.restaurants_df),
+                'total_users': len(self.users_df),
+                'total_reviews': len(self.history_df),
+                'cuisines': self.restaurants_df['cuisine'].nunique(),
+            }
+
+        return self._stats
 
 
 # Example usage
@@ -3,9 +3,11 @@ Recommender System Module
 Simplified recommendation based on vibes and time.
 """
 
+import numpy as np
 import pandas as pd
-from datetime import time as dt_time
+from datetime import datetime, time as dt_time
 from typing import List, Optional
+from sklearn.preprocessing import normalize
 from src.data_loader import DataLoader
 
 
@@ -20,7 +22,79 @@ class RestaurantRecommender:
             data_loader: DataLoader instance with loaded data
         """
         self.data_loader = data_loader
-    
+        self._item_norms = None
+        self._item_ids: Optional[np.ndarray] = None
+
+    def _get_item_norms(self):
+        """
+        L2-normalized item rows of the user-item rating matrix.
+
+        Caching the normalized sparse matrix (N x users) instead of the
+        full N x N cosine matrix keeps storage linear in the catalog;
+        a query's similarities are then one sparse row-times-transpose
+        product, which for normalized rows is exactly cosine similarity.
+
+        Returns:
+            Tuple of (normalized CSR item matrix, restaurant ids per row)
+        """
+        if self._item_norms is None:
+            # CSR input stays sparse end to end; normalize only scales
+            # the stored nonzeros.
+            matrix, _, item_ids = self.data_loader.get_user_item_sparse()
+            self._item_ids = item_ids
+            self._item_norms = normalize(matrix.T.tocsr(), norm='l2', axis=1)
+        return self._item_norms, self._item_ids
+
+    def get_similar_restaurants(self, restaurant_id: int, n: int = 5) -> pd.DataFrame:
+        """
+        Find restaurants rated similarly to the given one.
+
+        Args:
+            restaurant_id: Restaurant to find neighbours for
+            n: Number of similar restaurants to return
+
+        Returns:
+            DataFrame of the n most similar restaurants, most similar
+            first, with a 'similarity' column; empty if the restaurant
+            has no rating history
+        """
+        item_norms, item_ids = self._get_item_norms()
+        restaurants_df = self.data_loader.load_restaurants()
+
+        position = np.flatnonzero(item_ids == restaurant_id)
+        if len(position) == 0:
+            return restaurants_df.iloc[0:0]
+
+        # One sparse row against the normalized matrix: cosine scores
+        # for the query item only, no N x N materialization
+        scores = (item_norms[position[0]] @ item_norms.T).toarray().ravel()
+        scores[position[0]] = -np.inf  # exclude the restaurant itself
+
+        n = min(n, len(scores) - 1)
+        if n <= 0:
+            return restaurants_df.iloc[0:0]
+        # argpartition selects the top n in O(N); only those n get sorted
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top])]
+
+        similar = (
+            restaurants_df.set_index('restaurant_id')
+            .loc[item_ids[top]]
+            .reset_index()
+        )
+        similar['similarity'] = scores[top]
+        return similar
+
+    def _top_by_history_rating(self, candidates: pd.DataFrame, n: int) -> pd.DataFrame:
+        """
+        Take the top-n candidates by average visit rating.
+
+        Reads the avg_rating column the loader pre-aggregates at load
+        time (restaurants without history carry 0.0), so ranking is one
+        nlargest selection with no per-call history scan.
+        """
+        return candidates.nlargest(n, 'avg_rating')
+
     def recommend_by_vibe_and_time(
         self,
         vibes: List[str],
@@ -46,8 +120,8 @@ class RestaurantRecommender:
         users_df = self.data_loader.load_users()
         
         if not vibes:
-            # If no vibes selected, return empty or top N restaurants
-            return restaurants_df.head(n)
+            # If no vibes selected, return the overall top N restaurants
+            return self._top_by_history_rating(restaurants_df, n)
         
         # Get all user IDs to consider (main user + friends)
         all_user_ids = [user_id]
@@ -56,61 +130,74 @@ class RestaurantRecommender:
         
         # Get user preferences
         all_users = users_df[users_df['user_id'].isin(all_user_ids)]
-        
-        # Collect dietary requirements
-        needs_vegan = any(all_users['vegan'] == 'yes')
-        needs_vegetarian = any(all_users['vegetarian'] == 'yes')
-        needs_nonalcoholic = any(all_users['alcohol'] == 'no')
-        
-        # Collect allergies
-        allergies = []
-        for _, user in all_users.iterrows():
-            allergy = str(user['allgergies']).strip().lower()
-            if allergy and allergy != 'none' and allergy != 'nan':
-                allergies.append(allergy)
-        
-        # Match if any selected vibe is present in the restaurant's vibe list
-        def vibe_match(row):
-            if not row['vibes'] or len(row['vibes']) == 0:
-                return False
-            return any(v in row['vibes'] for v in vibes)
-        
-        # Filter by vibes first
-        filtered = restaurants_df[restaurants_df.apply(vibe_match, axis=1)].copy()
-        
-        # Filter by dietary requirements
+
+        # Collect dietary requirements from the semicolon-separated
+        # dietary_restrictions column (reading the on-disk user schema;
+        # 'vegatarian' tolerates the CSV's spelling)
+        diet_tokens = set()
+        for raw in all_users['dietary_restrictions'].dropna().astype(str):
+            diet_tokens.update(token.strip().lower() for token in raw.split(';'))
+        needs_vegan = 'vegan' in diet_tokens
+        needs_vegetarian = bool(diet_tokens & {'vegetarian', 'vegatarian'})
+        needs_nonalcoholic = (all_users['alcohol'] == 'no').any()
+
+        # Map the group's allergies to the restaurant columns that must
+        # say 'Yes'; a set so each constraint is applied once
+        required_columns = set()
         if needs_vegan:
-            filtered = filtered[filtered['vegan_options'] == 'Yes']
+            required_columns.add('vegan_options')
         if needs_vegetarian:
-            filtered = filtered[filtered['vegetarian_options'] == 'Yes']
+            required_columns.add('vegetarian_options')
         if needs_nonalcoholic:
-            filtered = filtered[filtered['nonalcoholic_options'] == 'Yes']
-        
-        # Filter by allergies
-        for allergy in allergies:
-            if 'peanut' in allergy or 'nut' in allergy:
-                filtered = filtered[filtered['nut_allergy_friendly'] == 'Yes']
-            elif 'shellfish' in allergy:
-                filtered = filtered[filtered['shellfish_allergy_friendly'] == 'Yes']
-            elif 'gluten' in allergy:
-                filtered = filtered[filtered['glutenfree_options'] == 'Yes']
-            elif 'dairy' in allergy or 'lactose' in allergy:
-                filtered = filtered[filtered['lactosefree_options'] == 'Yes']
-
-        # filter restaurants by selected time if provided
-        
+            required_columns.add('nonalcoholic_options')
+        for raw in all_users['allgergies'].dropna().astype(str):
+            for allergy in raw.split(';'):
+                allergy = allergy.strip().lower()
+                if not allergy or allergy == 'none':
+                    continue
+                if 'peanut' in allergy or 'nut' in allergy:
+                    required_columns.add('nut_allergy_friendly')
+                elif 'shellfish' in allergy:
+                    required_columns.add('shellfish_allergy_friendly')
+                elif 'gluten' in allergy:
+                    required_columns.add('glutenfree_options')
+                elif 'dairy' in allergy or 'lactose' in allergy:
+                    required_columns.add('lactosefree_options')
+
+        # Match if any selected vibe is present in the restaurant's vibe list.
+        # Series.map over the vibes column avoids the per-row Series
+        # construction an axis=1 apply would pay; isdisjoint is a single
+        # C-level set intersection test per restaurant.
+        selected_vibes = set(vibes)
+        # copy=True: the mask is AND-accumulated in place below
+        mask = restaurants_df['vibes'].map(
+            lambda restaurant_vibes: not selected_vibes.isdisjoint(restaurant_vibes)
+        ).to_numpy(copy=True)
+
+        # Fuse every dietary/allergy constraint into the same mask, so
+        # the frame is sliced once instead of per filter
+        for column in required_columns:
+            mask &= (restaurants_df[column] == 'Yes').to_numpy()
+
+        filtered = restaurants_df[mask]
+
+        # Filter by the selected time against today's opening/closing
+        # columns - the schema stores integer hours per weekday
+        # (e.g. Monday_opening=15 means 3 PM), one column pair per day
         if selected_time:
-            def time_match(row):
-                if not row['opening_hours'] or not row['closing_hours']:
-                    return False
-                opening = dt_time.fromisoformat(row['opening_hours'])
-                closing = dt_time.fromisoformat(row['closing_hours'])
-                if opening <= closing:
-                    return opening <= selected_time <= closing
-                else:  # Handles overnight hours (e.g., 10 PM to 2 AM)
-                    return selected_time >= opening or selected_time <= closing
-            
-            filtered = filtered[filtered.apply(time_match, axis=1)]
+            day = datetime.now().strftime('%A')
+            open_col, close_col = f'{day}_opening', f'{day}_closing'
+            if open_col in filtered.columns and close_col in filtered.columns:
+                hour = selected_time.hour + selected_time.minute / 60
+                opening = filtered[open_col].to_numpy()
+                closing = filtered[close_col].to_numpy()
+                # Overnight hours (e.g. 22 to 2) wrap past midnight
+                overnight = closing < opening
+                time_mask = np.where(
+                    overnight,
+                    (hour >= opening) | (hour <= closing),
+                    (hour >= opening) & (hour <= closing),
+                )
+                filtered = filtered[time_mask]
 
-        
-        return filtered.head(n)
+        return self._top_by_history_rating(filtered, n)